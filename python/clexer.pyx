@@ -0,0 +1,206 @@
+# cython: boundscheck=False, wraparound=False, language_level=3
+# Compiled lexer producing the same tokens as lexer.Lexer. Build it in
+# place with:
+#
+#     cythonize -i clexer.pyx
+#
+# It only mirrors get_next_token() and location(): text stays a str rather
+# than bytes, and there is no tokenize_all() or recycle(). Nothing imports
+# it automatically; callers opt in with `from clexer import Lexer`. Token
+# and TokenType are shared with the pure Python module, which stays the
+# reference implementation.
+from cpython.unicode cimport PyUnicode_READ_CHAR
+
+from lexer import TOKEN_VALUE, Token, TokenType
+
+# character classes, indexed by the code point of an ASCII character
+cdef enum:
+    DIGIT       = 1
+    IDENT_START = 2
+    SPACE       = 4
+    IDENT_PART  = IDENT_START | DIGIT
+
+cdef unsigned char _CLASS[128]
+
+cdef void _init_class_table():
+    cdef Py_UCS4 c
+    for c in range(128):
+        _CLASS[c] = 0
+    for c in range(ord('0'), ord('9') + 1):
+        _CLASS[c] |= DIGIT
+    for c in range(ord('A'), ord('Z') + 1):
+        _CLASS[c] |= IDENT_START
+    for c in range(ord('a'), ord('z') + 1):
+        _CLASS[c] |= IDENT_START
+    _CLASS[ord('_')] |= IDENT_START
+    for c in ' \t\n\r\f\v':
+        _CLASS[c] |= SPACE
+
+_init_class_table()
+
+cdef inline unsigned char _char_class(Py_UCS4 ch):
+    return _CLASS[ch] if ch < 128 else 0
+
+_SINGLE = {
+    '+': TokenType.PLUS,
+    '-': TokenType.MINUS,
+    '*': TokenType.MUL,
+    '/': TokenType.FLOAT_DIV,
+    '(': TokenType.LPAREN,
+    ')': TokenType.RPAREN,
+    ';': TokenType.SEMI,
+    '.': TokenType.DOT,
+    ',': TokenType.COMMA,
+}
+
+cdef class Lexer:
+    cdef readonly unicode text
+    cdef public Py_ssize_t pos
+    cdef public Py_ssize_t lineno
+    cdef Py_ssize_t _len
+    cdef Py_ssize_t _line_start
+    cdef Py_ssize_t _counted
+    cdef readonly dict reserved_keywords
+    cdef dict _intern
+
+    def __init__(self, unicode text):
+        self.text = text
+        self.pos = 0
+        self._len = len(text)
+        self.lineno = 1
+        self._line_start = 0
+        self._counted = 0
+        self.reserved_keywords = {
+            'PROGRAM': TokenType.PROGRAM,
+            'INTEGER': TokenType.INTEGER,
+            'REAL': TokenType.REAL,
+            'DIV': TokenType.INTEGER_DIV,
+            'VAR': TokenType.VAR,
+            'PROCEDURE': TokenType.PROCEDURE,
+            'BEGIN': TokenType.BEGIN,
+            'END': TokenType.END,
+        }
+        self._intern = {}
+
+    cdef inline Py_UCS4 char_at(self, Py_ssize_t pos):
+        # NUL past the end works as a sentinel for every scanning loop
+        if pos < self._len:
+            return PyUnicode_READ_CHAR(self.text, pos)
+        return 0
+
+    def error(self):
+        lineno, column = self.location(self.pos)
+        s = "Lexer error on '{lexeme}' line: {lineno} column: {column}".format(
+            lexeme=self.text[self.pos:self.pos + 1],
+            lineno=lineno,
+            column=column,
+        )
+        raise Exception(s)
+
+    cpdef tuple location(self, Py_ssize_t pos):
+        cdef Py_ssize_t i, lineno, line_start
+        if pos < self._counted:
+            # behind the last position asked for: count from the start and
+            # leave the running state alone
+            lineno = 1
+            line_start = 0
+            for i in range(pos):
+                if PyUnicode_READ_CHAR(self.text, i) == '\n':
+                    lineno += 1
+                    line_start = i + 1
+            return lineno, pos - line_start + 1
+        for i in range(self._counted, pos):
+            if PyUnicode_READ_CHAR(self.text, i) == '\n':
+                self.lineno += 1
+                self._line_start = i + 1
+        if pos > self._counted:
+            self._counted = pos
+        return self.lineno, pos - self._line_start + 1
+
+    cdef void skip_whitespace(self):
+        while _char_class(self.char_at(self.pos)) & SPACE:
+            self.pos += 1
+
+    cdef skip_comments(self):
+        while self.pos < self._len and self.char_at(self.pos) != '}':
+            self.pos += 1
+
+        if self.pos >= self._len:
+            self.error()
+        self.pos += 1 # eat '}'
+
+    cdef number(self):
+        cdef Py_ssize_t start = self.pos
+        while _char_class(self.char_at(self.pos)) & DIGIT:
+            self.pos += 1
+        # decimal number
+        if self.char_at(self.pos) == '.' and _char_class(self.char_at(self.pos + 1)) & DIGIT:
+            self.pos += 1 # skip the '.'
+            while _char_class(self.char_at(self.pos)) & DIGIT:
+                self.pos += 1
+            return self.new_token(TokenType.REAL_CONST, float(self.text[start:self.pos]), start)
+        else:
+            return self.new_token(TokenType.INTEGER_CONST, int(self.text[start:self.pos]), start)
+
+    cdef identifier(self):
+        cdef Py_ssize_t start = self.pos
+        while _char_class(self.char_at(self.pos)) & IDENT_PART:
+            self.pos += 1
+        result = self.text[start:self.pos]
+        result = self._intern.setdefault(result, result)
+        token_type = self.reserved_keywords.get(result, TokenType.IDENT)
+        return self.new_token(token_type, result, start)
+
+    cdef new_token(self, type, value, Py_ssize_t start):
+        if value is None:
+            value = TOKEN_VALUE[type]
+        line, col = self.location(start)
+        return Token(type, value, line, col)
+
+    cdef operator(self, type, type_equal):
+        # one or two character operator: the one at pos, alone or before '='
+        cdef Py_ssize_t start = self.pos
+        if self.char_at(start + 1) == '=':
+            self.pos += 2
+            return self.new_token(type_equal, None, start)
+        self.pos += 1
+        return self.new_token(type, None, start)
+
+    cpdef get_next_token(self):
+        cdef Py_UCS4 char
+        cdef unsigned char char_class
+        while self.pos < self._len:
+            char = self.char_at(self.pos)
+            char_class = _char_class(char)
+            if char_class & SPACE:
+                self.skip_whitespace()
+                continue
+
+            if char == '{':
+                self.skip_comments()
+                continue
+
+            if char_class & DIGIT:
+                return self.number()
+
+            if char_class & IDENT_START:
+                return self.identifier()
+
+            type = _SINGLE.get(char)
+            if type is not None:
+                self.pos += 1
+                return self.new_token(type, None, self.pos - 1)
+
+            if char == ':':
+                return self.operator(TokenType.COLON, TokenType.ASSIGN)
+            if char == '<':
+                return self.operator(TokenType.LESS, TokenType.LESS_EQUAL)
+            if char == '>':
+                return self.operator(TokenType.GREATER, TokenType.GREATER_EQUAL)
+            if char == '!':
+                return self.operator(TokenType.BANG, TokenType.BANG_EQUAL)
+
+            self.error()
+
+        line, col = self.location(self.pos)
+        return Token(TokenType.EOF, None, line, col)
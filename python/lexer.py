@@ -1,235 +1,373 @@
-from enum import Enum
+import re
+from array import array
+from dataclasses import dataclass, field
+from enum import IntEnum
 
 # exception handling
 class Error(Exception):
     def __init__(self, error_code=None, token=None, message=None):
+        super().__init__(message)
         self.error_code = error_code
         self.token = token
-        self.message = f'{self.__class__.__name__}: {message}'
+        self.message = message
+
+    def __str__(self):
+        return f'{self.__class__.__name__}: {self.message}'
 
 class LexerError(Error):
     pass
 
-class TokenType(Enum):
+# runs of whitespace and whole comments are skipped with one match each
+_WHITESPACE = b' \t\n\r\f\v'
+_WS_RE      = re.compile(rb'[ \t\n\r\f\v]+')
+_COMMENT_RE = re.compile(rb'\{[^}]*\}?')
+
+class TokenType(IntEnum):
     # single character token types
-    PLUS        = '+'
-    MINUS       = '-'
-    MUL         = '*'
-    FLOAT_DIV   = '/'
-    LPAREN      = '('
-    RPAREN      = ')'
-    LBRACE      = '{'
-    RBRACE      = '}'
-    SEMI        = ';'
-    DOT         = '.'
-    COLON       = ':'
-    COMMA       = ','
-    ASSIGN      = ':='
-    LESS        = '<'
-    LESS_EQUAL      = '<='
-    GREATER         = '>'
-    GREATER_EQUAL   = '>='
-    BANG            = '!'
-    EQUAL           = '='
-    BANG_EQUAL      = '!='
+    PLUS        = 1
+    MINUS       = 2
+    MUL         = 3
+    FLOAT_DIV   = 4
+    LPAREN      = 5
+    RPAREN      = 6
+    LBRACE      = 7
+    RBRACE      = 8
+    SEMI        = 9
+    DOT         = 10
+    COLON       = 11
+    COMMA       = 12
+    ASSIGN      = 13
+    LESS        = 14
+    LESS_EQUAL      = 15
+    GREATER         = 16
+    GREATER_EQUAL   = 17
+    BANG            = 18
+    EQUAL           = 19
+    BANG_EQUAL      = 20
     # block of reserved words
-    PROGRAM     = 'PROGRAM'
-    INTEGER     = 'INTEGER'
-    REAL        = 'REAL'
-    INTEGER_DIV = 'DIV'
-    VAR         = 'VAR'
-    PROCEDURE   = 'PROCEDURE'
-    BEGIN       = 'BEGIN'
-    END         = 'END'
+    PROGRAM     = 21
+    INTEGER     = 22
+    REAL        = 23
+    INTEGER_DIV = 24
+    VAR         = 25
+    PROCEDURE   = 26
+    BEGIN       = 27
+    END         = 28
     # misc
-    IDENT           = 'IDENT'
-    INTEGER_CONST   = 'INTEGER_CONST'
-    REAL_CONST      = 'REAL_CONST'
-    EOF             = 'EOF'
+    IDENT           = 29
+    INTEGER_CONST   = 30
+    REAL_CONST      = 31
+    EOF             = 32
+
+# display value of each token type, used as the value of tokens that
+# carry no literal and in messages
+TOKEN_VALUE = {
+    TokenType.PLUS: '+',
+    TokenType.MINUS: '-',
+    TokenType.MUL: '*',
+    TokenType.FLOAT_DIV: '/',
+    TokenType.LPAREN: '(',
+    TokenType.RPAREN: ')',
+    TokenType.LBRACE: '{',
+    TokenType.RBRACE: '}',
+    TokenType.SEMI: ';',
+    TokenType.DOT: '.',
+    TokenType.COLON: ':',
+    TokenType.COMMA: ',',
+    TokenType.ASSIGN: ':=',
+    TokenType.LESS: '<',
+    TokenType.LESS_EQUAL: '<=',
+    TokenType.GREATER: '>',
+    TokenType.GREATER_EQUAL: '>=',
+    TokenType.BANG: '!',
+    TokenType.EQUAL: '=',
+    TokenType.BANG_EQUAL: '!=',
+    TokenType.PROGRAM: 'PROGRAM',
+    TokenType.INTEGER: 'INTEGER',
+    TokenType.REAL: 'REAL',
+    TokenType.INTEGER_DIV: 'DIV',
+    TokenType.VAR: 'VAR',
+    TokenType.PROCEDURE: 'PROCEDURE',
+    TokenType.BEGIN: 'BEGIN',
+    TokenType.END: 'END',
+    TokenType.IDENT: 'IDENT',
+    TokenType.INTEGER_CONST: 'INTEGER_CONST',
+    TokenType.REAL_CONST: 'REAL_CONST',
+    TokenType.EOF: 'EOF',
+}
+
+# operator lexemes by length, merged below into the one table that both
+# builds the OPERATOR group of _TOKEN_RE and resolves what it matches
+_TWO_CHAR = {
+    b':=': TokenType.ASSIGN,
+    b'<=': TokenType.LESS_EQUAL,
+    b'>=': TokenType.GREATER_EQUAL,
+    b'!=': TokenType.BANG_EQUAL,
+}
+_ONE_CHAR = {
+    b'+': TokenType.PLUS,
+    b'-': TokenType.MINUS,
+    b'*': TokenType.MUL,
+    b'/': TokenType.FLOAT_DIV,
+    b'(': TokenType.LPAREN,
+    b')': TokenType.RPAREN,
+    b';': TokenType.SEMI,
+    b'.': TokenType.DOT,
+    b',': TokenType.COMMA,
+    b':': TokenType.COLON,
+    b'<': TokenType.LESS,
+    b'>': TokenType.GREATER,
+    b'!': TokenType.BANG,
+}
+
+_OPERATORS = dict(_TWO_CHAR)
+_OPERATORS.update(_ONE_CHAR)
+# type and value _scan() returns for each operator lexeme
+_OPERATOR_TOKENS = {lexeme: (type, TOKEN_VALUE[type]) for lexeme, type in _OPERATORS.items()}
+
+RESERVED_KEYWORDS = {
+    'PROGRAM': TokenType.PROGRAM,
+    'INTEGER': TokenType.INTEGER,
+    'REAL': TokenType.REAL,
+    'DIV': TokenType.INTEGER_DIV,
+    'VAR': TokenType.VAR,
+    'PROCEDURE': TokenType.PROCEDURE,
+    'BEGIN': TokenType.BEGIN,
+    'END': TokenType.END,
+}
+# type and value _scan() returns for each keyword lexeme
+_KEYWORD_TOKENS = {lexeme.encode('ascii'): (type, lexeme) for lexeme, type in RESERVED_KEYWORDS.items()}
+
+# one compiled pattern for the whole token alphabet: it skips whitespace and
+# comments, then matches exactly one token, captured in the group of its kind.
+# Operators are tried longest first, so ':=' is not read as ':' and '='.
+_TOKEN_RE = re.compile(rb'''
+    [ \t\n\r\f\v]* (?: \{[^}]*\} [ \t\n\r\f\v]* )*
+    (?:
+        (?P<IDENT>[A-Za-z_][A-Za-z0-9_]*)
+      | (?P<OPERATOR>%s)
+      | (?P<REAL_CONST>[0-9]+\.[0-9]+)
+      | (?P<INTEGER_CONST>[0-9]+)
+    )''' % b'|'.join(re.escape(lexeme) for lexeme in
+                     sorted(_OPERATORS, key=len, reverse=True)), re.VERBOSE)
+_GROUP_IDENT            = _TOKEN_RE.groupindex['IDENT']
+_GROUP_OPERATOR         = _TOKEN_RE.groupindex['OPERATOR']
+_GROUP_REAL_CONST       = _TOKEN_RE.groupindex['REAL_CONST']
+# the token types _scan() returns most, bound once to skip the Enum lookup
+_IDENT                  = TokenType.IDENT
+_REAL_CONST             = TokenType.REAL_CONST
+_INTEGER_CONST          = TokenType.INTEGER_CONST
 
 class Token(object):
+    __slots__ = ('type', 'value', 'line', 'col')
+
     def __init__(self, type, value, line = 0, col = 0):
         self.type = type
         self.value = value
         self.line = line
         self.col = col
 
+# tokens as parallel arrays, so no Token object is built unless asked.
+# `index` is a cursor for parsers that consume the stream in order; every
+# accessor takes an offset from it. Token types all fit in a byte, so
+# `types` is a bytearray.
+@dataclass
+class TokenStream:
+    types: bytearray = field(default_factory=bytearray)
+    values: list = field(default_factory=list)
+    lines: array = field(default_factory=lambda: array('i'))
+    cols: array = field(default_factory=lambda: array('i'))
+    index: int = 0
+
+    def __len__(self):
+        return len(self.types)
+
+    def _get(self, items, offset, empty):
+        # clamped to the stream: before the start answers the first token,
+        # past the end keeps answering EOF, like get_next_token does; an
+        # empty stream answers like the lone EOF of an empty source
+        if not items:
+            return empty
+        return items[max(0, min(self.index + offset, len(items) - 1))]
+
+    def peek_type(self, offset = 0):
+        # a plain int, which compares equal to its TokenType member
+        return self._get(self.types, offset, TokenType.EOF)
+
+    def advance(self):
+        if self.index < len(self.types) - 1:
+            self.index += 1
+
+    def value(self, offset = 0):
+        return self._get(self.values, offset, None)
+
+    def line(self, offset = 0):
+        return self._get(self.lines, offset, 1)
+
+    def col(self, offset = 0):
+        return self._get(self.cols, offset, 1)
+
+    def token(self, offset = 0):
+        return Token(TokenType(self.peek_type(offset)), self.value(offset),
+                     self.line(offset), self.col(offset))
+
 class Lexer(object):
     def __init__(self, text):
+        # the source is scanned as bytes, so indexing yields ints; anything
+        # outside latin-1 becomes '?', which keeps one byte per character
+        # and therefore the same offsets as the str. The original is kept
+        # so error messages name the real character.
+        self._source = text
+        if isinstance(text, str):
+            text = text.encode('latin-1', 'replace')
         self.text = text
         self.pos = 0
-        self.current_char = self.text[self.pos]
+        self._len = len(text)
+        # line and column are worked out lazily when a token is emitted:
+        # newlines are counted in bulk from the last emitted position on
         self.lineno = 1
-        self.column = 1
-        self.reserved_keywords = {
-            'PROGRAM': TokenType.PROGRAM,
-            'INTEGER': TokenType.INTEGER,
-            'REAL': TokenType.REAL,
-            'DIV': TokenType.INTEGER_DIV,
-            'VAR': TokenType.VAR,
-            'PROCEDURE': TokenType.PROCEDURE,
-            'BEGIN': TokenType.BEGIN,
-            'END': TokenType.END,
-        }
+        self._line_start = 0
+        self._counted = 0
+        # freelist of consumed tokens, see recycle()
+        self._free = []
+        # identifier lexemes are decoded once and interned, so repeated
+        # names share one string; keywords return their own constant value
+        # before this table is consulted
+        self._intern = {}
 
     def error(self):
+        lineno, column = self.location(self.pos)
+        lexeme = self._source[self.pos:self.pos + 1]
+        if isinstance(lexeme, bytes):
+            lexeme = lexeme.decode('latin-1')
         s = "Lexer error on '{lexeme}' line: {lineno} column: {column}".format(
-            lexeme=self.current_char,
-            lineno=self.lineno,
-            column=self.column,
+            lexeme=lexeme,
+            lineno=lineno,
+            column=column,
         )
         raise Exception(s)
 
-    def advance(self):
-        self.pos += 1
-        if self.pos > len(self.text) - 1:
-            self.current_char = None
-        else:
-            self.current_char = self.text[self.pos]
-        # new line
-        if self.current_char == '\n':
-            self.lineno += 1
-            self.column = 1
-    
-    def peek(self):
-        peek_pos = self.pos + 1
-        if peek_pos > len(self.text) - 1:
-            return None
-        else:
-            return self.text[peek_pos]
+    def location(self, pos):
+        text = self.text
+        counted = self._counted
+        if pos < counted:
+            # behind the last position asked for: count from the start and
+            # leave the running state alone
+            return (text.count(b'\n', 0, pos) + 1,
+                    pos - text.rfind(b'\n', 0, pos))
+        if pos > counted:
+            newlines = text.count(b'\n', counted, pos)
+            if newlines:
+                self.lineno += newlines
+                self._line_start = text.rfind(b'\n', counted, pos) + 1
+            self._counted = pos
+        return self.lineno, pos - self._line_start + 1
     
     def skip_whitespace(self):
-        while self.current_char != None and self.current_char.isspace():
-            self.advance()
+        self.pos = _WS_RE.match(self.text, self.pos).end()
     
     def skip_comments(self):
-        while self.current_char != None and self.current_char != '}':
-            self.advance()
-
-        if self.current_char == None:
+        self.pos = _COMMENT_RE.match(self.text, self.pos).end()
+        if self.text[self.pos - 1] != 0x7D: # '}'
+            # unterminated comment
             self.error()
-        self.advance() # eat '}'
-    
-    def number(self):
-        result = ''
-        while self.current_char != None and self.current_char.isdigit():
-            result += self.current_char
-            self.advance()
-        # decimal number
-        if self.current_char == '.' and self.peek().isdigit():
-            result += self.current_char
-            self.advance() # skip the '.'
-            while self.current_char != None and self.current_char.isdigit():
-                result += self.current_char
-                self.advance()
-            return self.new_token(TokenType.REAL_CONST, float(result))
-        else:
-            return self.new_token(TokenType.INTEGER_CONST, int(result))
-    
-    def isalpha(self, ch):
-        return ch.isalnum() or ch == '_'
-
-    def identifier(self):
-        result = ''
-        while self.current_char != None and self.current_char.isalpha():
-            result += self.current_char
-            self.advance()
-        token_type = self.reserved_keywords.get(result, TokenType.IDENT)
-        return self.new_token(token_type, result)
     
-    def new_token(self, type = None, value = None):
-        if value == None:
-            value = type
-        return Token(type, value, self.lineno, self.column)
+    def new_token(self, type, value, start):
+        line, col = self.location(start)
+        if self._free:
+            token = self._free.pop()
+            token.type = type
+            token.value = value
+            token.line = line
+            token.col = col
+            return token
+        return Token(type, value, line, col)
+
+    def recycle(self, token):
+        # the parser hands back tokens it is done with; new_token reuses
+        # them instead of allocating. The caller must hold no other
+        # reference to the token. A recycled token is marked by a None type,
+        # so handing the same one back twice is ignored instead of letting
+        # two later tokens share one object.
+        if token.type is None:
+            return
+        token.type = None
+        self._free.append(token)
 
     def get_next_token(self):
-        while self.current_char != None:
-            if self.current_char.isspace():
-                self.skip_whitespace()
-                continue
+        return self.new_token(*self._scan())
 
-            if self.current_char == '{':
-                self.skip_comments()
-                continue
-
-            if self.current_char.isdigit():
-                return self.number()
-            
-            if self.isalpha(self.current_char):
-                return self.identifier()
-
-            if self.current_char == '+':
-                self.advance()
-                return self.new_token(TokenType.PLUS)
-
-            if self.current_char == '-':
-                self.advance()
-                return self.new_token(TokenType.MINUS)
-
-            if self.current_char == '*':
-                self.advance()
-                return self.new_token(TokenType.MUL)
-            
-            if self.current_char == '/':
-                self.advance()
-                return self.new_token(TokenType.FLOAT_DIV)
-            
-            if self.current_char == '(':
-                self.advance()
-                return self.new_token(TokenType.LPAREN)
-            
-            if self.current_char == ')':
-                self.advance()
-                return self.new_token(TokenType.RPAREN)
-
-            if self.current_char == ';':
-                self.advance()
-                return self.new_token(TokenType.SEMI)
-
-            if self.current_char == '.':
-                self.advance()
-                return self.new_token(TokenType.DOT)
-
-            if self.current_char == ':':
-                if self.peek() == '=':
-                    self.advance() # eat ':'
-                    self.advance() # eat '='
-                    return self.new_token(TokenType.ASSIGN)
-                else:
-                    self.advance()
-                    return self.new_token(TokenType.COLON)
-
-            if self.current_char == ',':
-                self.advance()
-                return self.new_token(TokenType.COMMA)
-            
-            if self.current_char == '<':
-                self.advance()
-                if self.current_char == '=':
-                    self.advance()
-                    return self.new_token(TokenType.LESS_EQUAL)
-                else:
-                    return self.new_token(TokenType.LESS)
-            
-            if self.current_char == '>':
-                self.advance()
-                if self.current_char == '=':
-                    self.advance()
-                    return self.new_token(TokenType.GREATER_EQUAL)
-                else:
-                    return self.new_token(TokenType.GREATER)
-            
-            if self.current_char == '!':
-                self.advance()
-                if self.current_char == '=':
-                    self.advance()
-                    return self.new_token(TokenType.BANG_EQUAL)
-                else:
-                    return self.new_token(TokenType.BANG)
+    def tokenize_all(self):
+        # lex the rest of the input into a TokenStream, EOF included;
+        # preallocate for one token every two characters, doubling if the
+        # source is denser than that, and trim to size at the end
+        size = (self._len - self.pos) // 2 + 1
+        types = bytearray(size)
+        values = [None] * size
+        lines = array('i', [0]) * size
+        cols = array('i', [0]) * size
+        scan = self._scan
+        location = self.location
+        EOF = TokenType.EOF
+        n = 0
+        while True:
+            type, value, start = scan()
+            if n == size:
+                types.extend(bytes(size))
+                values.extend([None] * size)
+                lines.extend(array('i', [0]) * size)
+                cols.extend(array('i', [0]) * size)
+                size *= 2
+            types[n] = type
+            values[n] = value
+            lines[n], cols[n] = location(start)
+            n += 1
+            if type == EOF:
+                break
+        del types[n:], values[n:], lines[n:], cols[n:]
+        return TokenStream(types, values, lines, cols)
 
-            self.error()
+    def _scan(self):
+        # scan the next token and return its type, value and start offset
+        m = _TOKEN_RE.match(self.text, self.pos)
+        if m is None:
+            # end of input or a lexical error: let the hand-written scanner
+            # tell which one and report it
+            return self._scan_by_hand()
+        group = m.lastindex
+        start = m.start(group)
+        self.pos = m.end()
+        lexeme = m.group(group)
+        if group == _GROUP_IDENT:
+            keyword = _KEYWORD_TOKENS.get(lexeme)
+            if keyword is not None:
+                return keyword[0], keyword[1], start
+            result = self._intern.get(lexeme)
+            if result is None:
+                result = self._intern[lexeme] = lexeme.decode('ascii')
+            return _IDENT, result, start
+        if group == _GROUP_OPERATOR:
+            type, value = _OPERATOR_TOKENS[lexeme]
+            return type, value, start
+        if group == _GROUP_REAL_CONST:
+            return _REAL_CONST, float(lexeme), start
+        return _INTEGER_CONST, int(lexeme), start
+
+    def _scan_by_hand(self):
+        # _scan() falls back here when _TOKEN_RE finds no token ahead: past
+        # any whitespace and comments this is either the end of the input
+        # or a lexical error, which is reported at the offending character
+        text = self.text
+        while self.pos < self._len:
+            char = text[self.pos]
+            if char in _WHITESPACE:
+                self.skip_whitespace()
+            elif char == 0x7B: # '{'
+                self.skip_comments()
+            else:
+                self.error()
 
-        return Token(TokenType.EOF, None)
+        return TokenType.EOF, None, self.pos
 
 def main():
     # while True:
@@ -267,12 +405,13 @@ end.  { Main }
     token = lexer.get_next_token()
     while token.type != TokenType.EOF:
         print_token(token)
+        lexer.recycle(token)
         token = lexer.get_next_token()
     print_token(token)
         
 def print_token(token):
     print('type: {type} value: {value}'.format(
-        type = token.type,
+        type = token.type.name,
         value = token.value
     ))
 
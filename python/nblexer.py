@@ -0,0 +1,244 @@
+# Batch tokenizer with the scanning loop compiled by Numba. The kernel walks
+# the source bytes once and returns parallel arrays of token kinds and
+# offsets; Token objects are only built afterwards, in one Python pass.
+# Requires numba and numpy; lexer.Lexer is the pure Python equivalent.
+import numpy as np
+from numba import njit
+
+from lexer import TOKEN_VALUE, Lexer, Token, TokenType
+
+# token kinds as produced by the kernel, indexes into _KINDS
+_KINDS = (
+    TokenType.EOF,
+    TokenType.PLUS,
+    TokenType.MINUS,
+    TokenType.MUL,
+    TokenType.FLOAT_DIV,
+    TokenType.LPAREN,
+    TokenType.RPAREN,
+    TokenType.SEMI,
+    TokenType.DOT,
+    TokenType.COMMA,
+    TokenType.COLON,
+    TokenType.ASSIGN,
+    TokenType.LESS,
+    TokenType.LESS_EQUAL,
+    TokenType.GREATER,
+    TokenType.GREATER_EQUAL,
+    TokenType.BANG,
+    TokenType.BANG_EQUAL,
+    TokenType.PROGRAM,
+    TokenType.INTEGER,
+    TokenType.REAL,
+    TokenType.INTEGER_DIV,
+    TokenType.VAR,
+    TokenType.PROCEDURE,
+    TokenType.BEGIN,
+    TokenType.END,
+    TokenType.IDENT,
+    TokenType.INTEGER_CONST,
+    TokenType.REAL_CONST,
+)
+_K = {type: kind for kind, type in enumerate(_KINDS)}
+_EOF            = _K[TokenType.EOF]
+_PLUS           = _K[TokenType.PLUS]
+_MINUS          = _K[TokenType.MINUS]
+_MUL            = _K[TokenType.MUL]
+_FLOAT_DIV      = _K[TokenType.FLOAT_DIV]
+_LPAREN         = _K[TokenType.LPAREN]
+_RPAREN         = _K[TokenType.RPAREN]
+_SEMI           = _K[TokenType.SEMI]
+_DOT            = _K[TokenType.DOT]
+_COMMA          = _K[TokenType.COMMA]
+_COLON          = _K[TokenType.COLON]
+_LESS           = _K[TokenType.LESS]
+_GREATER        = _K[TokenType.GREATER]
+_BANG           = _K[TokenType.BANG]
+_PROGRAM        = _K[TokenType.PROGRAM]
+_INTEGER        = _K[TokenType.INTEGER]
+_REAL           = _K[TokenType.REAL]
+_INTEGER_DIV    = _K[TokenType.INTEGER_DIV]
+_VAR            = _K[TokenType.VAR]
+_PROCEDURE      = _K[TokenType.PROCEDURE]
+_BEGIN          = _K[TokenType.BEGIN]
+_END            = _K[TokenType.END]
+_IDENT          = _K[TokenType.IDENT]
+_INTEGER_CONST  = _K[TokenType.INTEGER_CONST]
+_REAL_CONST     = _K[TokenType.REAL_CONST]
+_ERROR          = -1
+
+# reserved words as byte arrays, frozen into the kernel as constants
+_KW_PROGRAM     = np.frombuffer(b'PROGRAM', dtype=np.uint8)
+_KW_INTEGER     = np.frombuffer(b'INTEGER', dtype=np.uint8)
+_KW_REAL        = np.frombuffer(b'REAL', dtype=np.uint8)
+_KW_DIV         = np.frombuffer(b'DIV', dtype=np.uint8)
+_KW_VAR         = np.frombuffer(b'VAR', dtype=np.uint8)
+_KW_PROCEDURE   = np.frombuffer(b'PROCEDURE', dtype=np.uint8)
+_KW_BEGIN       = np.frombuffer(b'BEGIN', dtype=np.uint8)
+_KW_END         = np.frombuffer(b'END', dtype=np.uint8)
+
+@njit(cache=True)
+def _is_word(buf, start, word):
+    for i in range(len(word)):
+        if buf[start + i] != word[i]:
+            return False
+    return True
+
+@njit(cache=True)
+def _keyword(buf, start, end):
+    # only eight reserved words: switch on the length, then compare bytes
+    length = end - start
+    if length == 3:
+        if _is_word(buf, start, _KW_VAR):
+            return _VAR
+        if _is_word(buf, start, _KW_END):
+            return _END
+        if _is_word(buf, start, _KW_DIV):
+            return _INTEGER_DIV
+    elif length == 4:
+        if _is_word(buf, start, _KW_REAL):
+            return _REAL
+    elif length == 5:
+        if _is_word(buf, start, _KW_BEGIN):
+            return _BEGIN
+    elif length == 7:
+        if _is_word(buf, start, _KW_PROGRAM):
+            return _PROGRAM
+        if _is_word(buf, start, _KW_INTEGER):
+            return _INTEGER
+    elif length == 9:
+        if _is_word(buf, start, _KW_PROCEDURE):
+            return _PROCEDURE
+    return _IDENT
+
+@njit(inline='always')
+def _is_digit(c):
+    return 48 <= c <= 57
+
+@njit(inline='always')
+def _is_ident_start(c):
+    return 65 <= c <= 90 or 97 <= c <= 122 or c == 95
+
+@njit(cache=True)
+def _scan(buf):
+    n = len(buf)
+    # there can never be more tokens than characters, plus EOF
+    kinds = np.empty(n + 1, dtype=np.int32)
+    starts = np.empty(n + 1, dtype=np.int32)
+    ends = np.empty(n + 1, dtype=np.int32)
+    count = 0
+    pos = 0
+    while pos < n:
+        c = buf[pos]
+        # whitespace
+        if c == 32 or 9 <= c <= 13:
+            pos += 1
+            continue
+        # comments
+        if c == 123:
+            while pos < n and buf[pos] != 125:
+                pos += 1
+            if pos >= n:
+                kinds[count] = _ERROR
+                starts[count] = pos
+                ends[count] = pos
+                return kinds[:count + 1], starts[:count + 1], ends[:count + 1]
+            pos += 1
+            continue
+
+        start = pos
+        two = buf[pos + 1] if pos + 1 < n else 0
+        if _is_digit(c):
+            kind = _INTEGER_CONST
+            while pos < n and _is_digit(buf[pos]):
+                pos += 1
+            # decimal number
+            if pos + 1 < n and buf[pos] == 46 and _is_digit(buf[pos + 1]):
+                kind = _REAL_CONST
+                pos += 1
+                while pos < n and _is_digit(buf[pos]):
+                    pos += 1
+        elif _is_ident_start(c):
+            while pos < n and (_is_ident_start(buf[pos]) or _is_digit(buf[pos])):
+                pos += 1
+            kind = _keyword(buf, start, pos)
+        elif c == 43:
+            kind = _PLUS
+        elif c == 45:
+            kind = _MINUS
+        elif c == 42:
+            kind = _MUL
+        elif c == 47:
+            kind = _FLOAT_DIV
+        elif c == 40:
+            kind = _LPAREN
+        elif c == 41:
+            kind = _RPAREN
+        elif c == 59:
+            kind = _SEMI
+        elif c == 46:
+            kind = _DOT
+        elif c == 44:
+            kind = _COMMA
+        elif c == 58:
+            kind = _COLON
+        elif c == 60:
+            kind = _LESS
+        elif c == 62:
+            kind = _GREATER
+        elif c == 33:
+            kind = _BANG
+        else:
+            kinds[count] = _ERROR
+            starts[count] = pos
+            ends[count] = pos
+            return kinds[:count + 1], starts[:count + 1], ends[:count + 1]
+
+        if pos == start:
+            pos += 1
+            # ':=', '<=', '>=' and '!=' directly follow their one char kind
+            if two == 61 and (kind == _COLON or kind == _LESS or kind == _GREATER or kind == _BANG):
+                kind += 1
+                pos += 1
+        kinds[count] = kind
+        starts[count] = start
+        ends[count] = pos
+        count += 1
+
+    kinds[count] = _EOF
+    starts[count] = pos
+    ends[count] = pos
+    count += 1
+    return kinds[:count], starts[:count], ends[:count]
+
+def tokenize(text):
+    """Lex the whole of `text` and return the list of tokens, EOF included."""
+    # latin-1 with 'replace' keeps one byte per character, so byte offsets
+    # are also offsets into `text`
+    buf = np.frombuffer(text.encode('latin-1', 'replace'), dtype=np.uint8)
+    kinds, starts, ends = _scan(buf)
+
+    # the Lexer provides line/column tracking and error reporting
+    lexer = Lexer(text)
+    intern = {}
+    location = lexer.location
+    tokens = []
+    for kind, start, end in zip(kinds.tolist(), starts.tolist(), ends.tolist()):
+        if kind == _ERROR:
+            lexer.pos = start
+            lexer.error()
+        type = _KINDS[kind]
+        if kind == _EOF:
+            value = None
+        elif kind == _INTEGER_CONST:
+            value = int(text[start:end])
+        elif kind == _REAL_CONST:
+            value = float(text[start:end])
+        elif kind >= _PROGRAM:
+            value = text[start:end]
+            value = intern.setdefault(value, value)
+        else:
+            value = TOKEN_VALUE[type]
+        line, col = location(start)
+        tokens.append(Token(type, value, line, col))
+    return tokens